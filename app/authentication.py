@@ -1,10 +1,16 @@
 # authentication.py
+import hashlib
+import hmac
+import json
 import jwt
+from calendar import timegm
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
+from functools import lru_cache
 import os
 
-from werkzeug.security import check_password_hash
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHash
 
 # Define the algorithm you want to use for JWT
 ALGORITHM = os.getenv('AUDIOBIO_JWT_ALGORITHM')
@@ -12,8 +18,32 @@ ALGORITHM = os.getenv('AUDIOBIO_JWT_ALGORITHM')
 # define the Secret key
 SECRET_KEY = os.getenv('AUDIOBIO_SECRET_AUTH_KEY')
 
-# Get a crypt context for handling passwords
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hasher for new passwords: argon2id, computed by libargon2's C implementation
+PASSWORD_HASHER = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+
+# Prefix of the argon2 hash format
+ARGON2_PREFIX = "$argon2"
+
+# Prefixes of the legacy bcrypt hash formats
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# Prefix of the legacy werkzeug scrypt hash format eg. scrypt:32768:8:1$<salt>$<hex hash>
+LEGACY_SCRYPT_PREFIX = "scrypt:"
+
+# A single JWS signer reused for every token
+_JWS = jwt.PyJWS(algorithms=[ALGORITHM] if ALGORITHM else None)
+
+# A single JWT decoder reused for every token
+_JWT = jwt.PyJWT()
+
+
+@lru_cache(maxsize=1)
+def get_secret_key_bytes() -> bytes:
+    """
+    Get the JWT secret key as bytes, encoding it only once
+    :return: The secret key as bytes
+    """
+    return SECRET_KEY.encode()
 
 
 class AuthenticationService:
@@ -50,19 +80,59 @@ class AuthenticationService:
         """
         access_token_expires = timedelta(minutes=self.token_expire_minutes)
         to_encode = {"sub": str(email),
-                     "exp": datetime.utcnow() + access_token_expires,}
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=ALGORITHM)
+                     "exp": timegm((datetime.utcnow() + access_token_expires).utctimetuple()),}
+        payload = json.dumps(to_encode, separators=(",", ":")).encode()
+        encoded_jwt = _JWS.encode(payload, get_secret_key_bytes(), algorithm=ALGORITHM)
         return encoded_jwt
 
+    @staticmethod
+    def decode_token(token: str) -> dict:
+        """
+        Verify and decode a JWT token created by create_token
+        :param token: The JWT token
+        :return: The payload of the token
+        :raises jwt.PyJWTError: If the token is invalid or has expired
+        """
+        return _JWT.decode(token, get_secret_key_bytes(), algorithms=[ALGORITHM])
+
     @classmethod
     def verify_password(cls, entered_password, database_password) -> bool:
         """
         Verify the password entered by the users
+
+        Passwords hashed before the move to argon2 are stored in bcrypt or werkzeug's scrypt format and are still
+        accepted
         :param entered_password:
         :param database_password:
         :return bool: True if the password is correct, else False
         """
-        return check_password_hash(database_password, entered_password)
+        if database_password.startswith(ARGON2_PREFIX):
+            try:
+                return PASSWORD_HASHER.verify(database_password, entered_password)
+            except (VerificationError, InvalidHash):
+                return False
+        if database_password.startswith(BCRYPT_PREFIXES):
+            return bcrypt.checkpw(entered_password.encode(), database_password.encode())
+        if database_password.startswith(LEGACY_SCRYPT_PREFIX):
+            return cls.verify_legacy_scrypt_password(entered_password, database_password)
+        return False
+
+    @staticmethod
+    def verify_legacy_scrypt_password(entered_password, database_password) -> bool:
+        """
+        Verify a password against a legacy werkzeug scrypt hash, with hashlib rather than werkzeug
+        :param entered_password: The password entered by the users
+        :param database_password: The hash in the format of scrypt:N:r:p$salt$hex_hash
+        :return bool: True if the password is correct, else False
+        """
+        try:
+            method, salt, expected_hash = database_password.split("$", 2)
+            n, r, p = (int(value) for value in method[len(LEGACY_SCRYPT_PREFIX):].split(":"))
+        except ValueError:
+            return False
+        entered_hash = hashlib.scrypt(entered_password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                                      maxmem=132 * n * r * p).hex()
+        return hmac.compare_digest(entered_hash, expected_hash)
 
 
 
@@ -1,23 +1,32 @@
 # main.py
-import datetime
-import tempfile
+import contextlib
+import functools
+import hashlib
+import time
 import uuid
 import logging
-from fastapi import FastAPI, UploadFile, HTTPException, File, Form, Depends, HTTPException, status
+from fastapi import FastAPI, UploadFile, HTTPException, File, Form, Depends, HTTPException, status, BackgroundTasks, \
+    Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 import os
+import magic
 import openai
-import boto3
-from botocore.exceptions import NoCredentialsError
+import anyio
+import anyio.to_thread
+import aioboto3
+from botocore.exceptions import NoCredentialsError, ClientError
 from botocore.client import Config
-from boto3.exceptions import S3UploadFailedError
-from app.mongo_db_logic import Users, UserManager, JournalManager, get_current_date, get_formatted_date
+from app.mongo_db_logic import Users, UserManager, JournalManager, get_current_date, get_formatted_date, \
+    MONGO_MAX_POOL_SIZE
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel, EmailStr
-from app.authentication import AuthenticationService, ALGORITHM, SECRET_KEY
+from app.authentication import AuthenticationService
 
 from fastapi.security import OAuth2PasswordRequestForm
 import jwt
+from cachetools import TLRUCache
 from typing import Optional, List
 
 
@@ -26,7 +35,35 @@ from typing import Optional, List
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-app = FastAPI()
+# Maximum number of seconds a verified token and its user are kept in the auth cache
+AUTH_CACHE_TTL_SECONDS = 60
+
+
+def _auth_cache_ttu(_key, value, now) -> float:
+    """
+    Get the time at which an auth cache entry expires: AUTH_CACHE_TTL_SECONDS from now, or when the token expires
+    if that is sooner
+    :param value: tuple of the decoded token payload and the user
+    :param now: the cache's current (monotonic) time
+    :return: the expiry time of the entry
+    """
+    payload, _ = value
+    if "exp" not in payload:
+        return now + AUTH_CACHE_TTL_SECONDS
+    seconds_until_token_expires = payload["exp"] - time.time()
+    return now + min(AUTH_CACHE_TTL_SECONDS, seconds_until_token_expires)
+
+
+# Cache of verified tokens, keyed by a digest of the token, to skip jwt.decode and the user lookup on repeat requests
+auth_cache = TLRUCache(maxsize=4096, ttu=_auth_cache_ttu)
+
+
+def clear_auth_cache() -> None:
+    """Remove every entry from the auth cache"""
+    auth_cache.clear()
+
+# Serialize every response with orjson rather than the standard library json module
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Allow CORS (Cross Origin Resource Sharing) for your React application
 # Replace 'http://localhost:3000' with the address where your React app is running.
@@ -39,13 +76,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-s3 = boto3.client(
-    's3',
+s3_session = aioboto3.Session(
     region_name='us-east-2',
     aws_access_key_id=os.environ['_AWS_ACCESS_KEY_ID_AUDIOBIO'],
     aws_secret_access_key=os.environ['_AWS_SECRET_ACCESS_KEY_AUDIOBIO'],
-    config=Config(signature_version='s3v4')
 )
+s3_config = Config(
+    signature_version='s3v4',
+    s3={'payload_signing_enabled': False, 'use_accelerate_endpoint': False},
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Name of the S3 bucket where the recordings are stored
+S3_BUCKET_NAME = 'audiobio-recordings'
+
+# Extensions of the audio files that can be uploaded
+ALLOWED_AUDIO_EXTENSIONS = frozenset({'.m4a', '.mp3', '.wav', '.ogg', '.webm', '.flac'})
+
+# MIME types libmagic reports for those audio files. Browser recordings in webm or mp4 containers are detected as video
+ALLOWED_AUDIO_MIME_TYPES = frozenset({
+    'audio/mp4', 'audio/x-m4a', 'video/mp4',
+    'audio/mpeg',
+    'audio/wav', 'audio/x-wav', 'audio/vnd.wave',
+    'audio/ogg', 'application/ogg',
+    'audio/webm', 'video/webm',
+    'audio/flac', 'audio/x-flac',
+})
+
+# Number of password hashes or verifications that may run at once. Each argon2id hash holds 64 MiB of memory, so this
+# is kept well below the database threadpool size. The limiter is created on startup, inside the event loop
+PASSWORD_HASHING_CONCURRENCY = int(os.getenv('AUDIOBIO_PASSWORD_HASHING_CONCURRENCY', 4))
+password_hashing_limiter = None
+
+# A single S3 client, and its connection pool, shared by every request. Opened on startup and closed on shutdown
+s3 = None
+s3_exit_stack = contextlib.AsyncExitStack()
+
+
+@app.on_event("startup")
+async def size_threadpool() -> None:
+    """
+    Size the threadpool that runs the blocking database calls to the MongoDB connection pool, so every thread can get
+    a connection and no connection sits unused. Password work gets its own, much smaller, limit
+    """
+    global password_hashing_limiter
+    anyio.to_thread.current_default_thread_limiter().total_tokens = MONGO_MAX_POOL_SIZE
+    password_hashing_limiter = anyio.CapacityLimiter(PASSWORD_HASHING_CONCURRENCY)
+
+
+async def run_password_work(func, **kwargs):
+    """
+    Run a function that hashes or verifies a password in a thread, limited by password_hashing_limiter rather than the
+    pool-sized database limit
+    :param func: the function to run
+    :param kwargs: the keyword arguments of the function
+    :return: the return value of the function
+    """
+    return await anyio.to_thread.run_sync(functools.partial(func, **kwargs), limiter=password_hashing_limiter)
+
+
+@app.on_event("startup")
+async def open_s3_client() -> None:
+    """Open the shared S3 client"""
+    global s3
+    s3 = await s3_exit_stack.enter_async_context(s3_session.client('s3', config=s3_config))
+
+
+@app.on_event("shutdown")
+async def close_s3_client() -> None:
+    """Close the shared S3 client"""
+    await s3_exit_stack.aclose()
+
+# A single OpenAI client, whose connection pool is reused for every transcription
+openai_client = openai.AsyncOpenAI(api_key=os.environ['OPENAI_API_KEY'])
 
 # Initiate the database class
 users = Users()
@@ -65,11 +170,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Users:
     - Gets the user from the database
     - Returns the user
 
+    This is the only place a request looks the user up. Endpoints pass the returned user straight to JournalManager,
+    whose queries only read the DayBundle collection, so the user is never fetched twice for the same request.
+
     :param token: The JWT token
     :return: The user
     """
     logger.info("get_current_user: start")
-    logger.info(f"get_current_user: token: {token}")
 
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,25 +184,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Users:
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = auth_cache.get(cache_key)
+    if cached is not None:
+        _, user = cached
+        return user
+
     try:
-        payload = jwt.decode(
-            jwt=token,
-            key=SECRET_KEY,
-            algorithms=[ALGORITHM]
-        )
+        payload = AuthenticationService.decode_token(token)
         username: Optional[str] = payload.get("sub")
-        logger.info(f"Successfully decoded token, username: {username}")
+        logger.info("Successfully decoded token, username: %s", username)
         if username is None:
             logger.info("username is None")
             raise credentials_exception
 
     except jwt.PyJWTError as e:
-        logger.info(f"jwt.PyJWTError: Could not validate credentials, token: Error: {e}")
+        logger.info("jwt.PyJWTError: Could not validate credentials, token: Error: %s", e)
+        auth_cache.pop(cache_key, None)
         raise credentials_exception
-    user = UserManager.find_user_by_email(email=username)
+    user = await run_in_threadpool(UserManager.find_user_full, email=username)
     if user is None:
         logger.info("user is None: could not find that user")
         raise credentials_exception
+
+    auth_cache[cache_key] = (payload, user)
     return user
 
 
@@ -105,7 +217,6 @@ class Token(BaseModel):
 
 
 # Authenticate user and return a JWT token
-import logging
 
 
 @app.post("/login/", response_model=Token)
@@ -123,13 +234,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
     :return:  JWT token
     """
     logging.info("Attempting to find user by email...")
-    user = UserManager.find_user_by_email(email=form_data.username)
+    user = await run_in_threadpool(UserManager.find_user_for_auth, email=form_data.username)
 
     # Initiate the authentication service
     auth = AuthenticationService(user)
 
     if user is None:
-        logging.error(f"User with email {form_data.username} not found.")
+        logging.error("User with email %s not found.", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect name or password",
@@ -138,15 +249,17 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
 
     hashed_password = user.hashed_password
 
-    if not auth.verify_password(entered_password=form_data.password, database_password=hashed_password):
-        logging.error(f"Failed password verification for user {form_data.username}")
+    password_is_correct = await run_password_work(auth.verify_password, entered_password=form_data.password,
+                                                  database_password=hashed_password)
+    if not password_is_correct:
+        logging.error("Failed password verification for user %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect name or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logging.info(f"Creating token for user {form_data.username}...")
+    logging.info("Creating token for user %s...", form_data.username)
     access_token = auth.create_token(
         email=form_data.username,
     )
@@ -170,13 +283,13 @@ async def signup(new_user: UserCreate) -> Token:
     - Checks if the user already exists, if so, raises an HTTPException.
     - Splits the name into first and last names.
     - Creates a new user.
-    - Authenticates the new user and returns a JWT token.
+    - Creates a JWT token for the new user and returns it.
 
     :param new_user: A UserCreate model instance containing the new user's email, name, and password.
     :return: A Token model instance containing the JWT access token and token type.
     :raises HTTPException: If the email is already registered or if user creation fails.
     """
-    existing_user = UserManager.find_user_by_email(email=new_user.email)
+    existing_user = await run_in_threadpool(UserManager.find_user_for_auth, email=new_user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -193,27 +306,19 @@ async def signup(new_user: UserCreate) -> Token:
         last_name = name[1]
 
     # Create a new user
-    UserManager.create_user(email=new_user.email, first_name=first_name, last_name=last_name,
-                            password=new_user.password)
-
-    created_user = UserManager.find_user_by_email(email=new_user.email)
+    created_user = await run_password_work(UserManager.create_user, email=new_user.email, first_name=first_name,
+                                           last_name=last_name, password=new_user.password)
 
-    if  created_user is None:
+    if created_user is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="User creation failed",
         )
 
     # Initiate the authentication service
-    user_is_authenticated = AuthenticationService(user=created_user).authenticate_user(password=new_user.password)
+    auth = AuthenticationService(user=created_user)
 
-    if user_is_authenticated is False:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="User creation failed",
-        )
-
-    access_token = AuthenticationService(user=created_user).create_token(
+    access_token = auth.create_token(
         email=created_user.email
     )
 
@@ -222,6 +327,7 @@ async def signup(new_user: UserCreate) -> Token:
 
 @app.post("/upload/")
 async def upload_audio(
+        background_tasks: BackgroundTasks,
         audio: UploadFile = File(...),
         current_user: Users = Depends(get_current_user),
         length_in_seconds: str = Form(...)
@@ -230,142 +336,140 @@ async def upload_audio(
     FastAPI endpoint to upload an audio file to the backend from the frontend
 
     What it does:
-    - Checks if the audio file is an audio file
-    - Reads the audio file
+    - Checks if the audio file is an audio file, from its extension and its content
+    - Uploads the audio file to S3
     - Creates a journal entry
+    - Transcribes the audio file in the background, after the response is sent
 
+    :param background_tasks: The tasks to run after the response is sent
     :param current_user: The current user
     :param audio: audio file
     :param length_in_seconds: length of the audio file
     :return: name of the audio file if successful, else error message
     """
-    logger.info(f"current_user: {current_user.first_name}: entered the upload_audio endpoint")
+    logger.info("current_user: %s: entered the upload_audio endpoint", current_user.first_name)
     try:
-        logger.info(f"current_user: {current_user.first_name}: entered the upload_audio endpoint")
+        extension = os.path.splitext(audio.filename)[1].lower()
+
         if length_in_seconds == None:
-            logger.error(f'No length of audio file provided, User: {current_user.first_name}')
+            logger.error('No length of audio file provided, User: %s', current_user.first_name)
 
             raise HTTPException(status_code=400, detail="No length of audio file provided")
-        elif audio.content_type.startswith('audio/'):
-            audio_content = await audio.read()  # Store the audio content in a variable
+        elif extension in ALLOWED_AUDIO_EXTENSIONS and await has_allowed_audio_mime_type(audio):
+            # Create a random UUID, keeping the extension of the uploaded file
+            audio_filename = f"AudioBio_Recording_{uuid.uuid4().hex}{extension}"
 
-            audio_filename, tmp_name = handle_upload(audio.filename, audio_content)
-            audio_filename = upload_to_s3(tmp_name, audio_filename)
+            # Read the upload once: the same content is sent to S3 and, after the response, to Whisper
+            audio_content = await audio.read()
 
-            logger.info(f"Length of audio file: {length_in_seconds} seconds, User: {current_user.first_name}")
+            audio_filename = await upload_to_s3(audio_content, audio_filename)
+
+            logger.info("Length of audio file: %s seconds, User: %s", length_in_seconds, current_user.first_name)
 
             # Create a journal entry
             journal_manager = JournalManager(current_user)
-            today_journal_bundle, this_journal_entry = journal_manager.add_journal_entry(
+            today_journal_bundle, this_journal_entry = await run_in_threadpool(
+                journal_manager.add_journal_entry,
                 recording_file_name=audio_filename,
                 recording_seconds=float(length_in_seconds)
             )
 
-            # delete the temp file
-            os.remove(tmp_name)
-
             # Transcribe audio
-            transcription_object = gpt_whisper(s3, 'audiobio-recordings', audio_filename)
-
-            transcription = transcription_object["text"]
-
-            journal_manager.add_entry_transcription(transcription=transcription, entry_id=this_journal_entry.id)
+            background_tasks.add_task(transcribe_and_save, audio_content, audio_filename, this_journal_entry.id,
+                                      journal_manager)
 
             return {"filename": audio_filename}
         else:
-            logger.error(f'Invalid file type: {audio.content_type}, User: {current_user.first_name}')
+            logger.error('Invalid file type: %s, User: %s', audio.content_type, current_user.first_name)
 
             raise HTTPException(status_code=400, detail="Invalid file type")
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f'Failed to process audio upload: {str(e)}, User: {current_user.first_name}')
+        logger.error('Failed to process audio upload: %s, User: %s', e, current_user.first_name)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-def handle_upload(audio_filename, audio_content) -> tuple:
+async def has_allowed_audio_mime_type(audio: UploadFile) -> bool:
     """
-    Writes an audio file to a temporary location
-
-    What it does:
-    - Creates a random UUID
-    - Saves the audio file in a temporary directory
-
-    :param audio_filename: name of the audio file
-    :param audio_content: content of the audio file
-    :return: name of the audio file and the temporary location
+    Checks the type of an uploaded file from its first bytes with libmagic, rather than trusting the content type
+    sent by the client
+    :param audio: audio file
+    :return: True if the file is one of the allowed audio types, else False
     """
-    # Create a random UUID
-    audio_filename = f"AudioBio_Recording_{uuid.uuid4()}.{audio_filename.split('.')[-1]}"
-
-    # Save the audio file in a temporary directory
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        tmp.write(audio_content)  # Write audio content to the temp file
-        print("temp file saved", tmp.name)
-
-        return audio_filename, tmp.name
+    header = await audio.read(4096)
+    await audio.seek(0)
+    return magic.from_buffer(header, mime=True) in ALLOWED_AUDIO_MIME_TYPES
 
 
 # TODO: Move this to a separate file and encapsulate it in an AWS/S3 class
-def upload_to_s3(tmp_name, audio_filename) -> str or dict:
+async def upload_to_s3(audio_content, audio_filename) -> str:
     """
-    Uploads an audio file from a temporary location to S3 bucket
+    Uploads an audio file to S3 bucket
 
     What it does:
-    - Uploads the audio file to S3 bucket
-    - Returns the name of the audio file if successful, else error message
+    - Uploads the audio content to S3 bucket in a single request without blocking the event loop
+    - Returns the name of the audio file if successful, else raises an HTTPException
 
-    :param tmp_name: name of the temporary file
+    :param audio_content: content of the audio file
     :param audio_filename: name of the audio file
-    :return: name of the audio file if successful, else error message
+    :return: name of the audio file
     """
 
-    logger.info(f"Uploading {tmp_name} to S3 bucket")
+    logger.info("Uploading %s to S3 bucket", audio_filename)
     # Upload to S3 bucket and return the name of the audio file
     try:
-        with open(tmp_name, 'rb') as data:
-            s3.upload_fileobj(
-                data,
-                'audiobio-recordings',
-                audio_filename,
-            )
+        await s3.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=audio_filename,
+            Body=audio_content,
+        )
     except NoCredentialsError as e:
-        logger.info(f"Credentials not available: {e}")
+        logger.info("Credentials not available: %s", e)
         raise HTTPException(status_code=400, detail=f"Credentials not available: {e}")
-    except S3UploadFailedError as e:
-        logger.info(f"Upload failed: {e}")
+    except ClientError as e:
+        logger.info("Upload failed: %s", e)
         raise HTTPException(status_code=400, detail=f"Upload failed: {e}")
     except Exception as e:
-        logger.info(f"Unknown error: {e}")
+        logger.info("Unknown error: %s", e)
         raise HTTPException(status_code=400, detail=f"Unknown error: {e}")
 
-    logger.info(f"Uploaded {tmp_name} to S3 bucket successfully")
+    logger.info("Uploaded %s to S3 bucket successfully", audio_filename)
 
     return audio_filename
 
 
 # TODO: Move this to a separate file and encapsulate it in a gpt class
-def gpt_whisper(s3_client, bucket_name, audio_filename) -> str:
+async def gpt_whisper(audio_file, audio_filename) -> str:
     """
-    Transcribes an audio file using OpenAI's GPT-3 API
-    :param s3_client: s3 client object
-    :param bucket_name: name of s3 the bucket where the audio file is stored
-    :param audio_filename: name of the audio file
+    Transcribes an audio file using OpenAI's Whisper API
+    :param audio_file: file object or content of the audio file
+    :param audio_filename: name of the audio file, used by the API to detect the audio format
     :return: transcript of the audio file
     """
-    openai.api_key = os.getenv("OPENAI_API_KEY")
+    transcript = await openai_client.audio.transcriptions.create(model="whisper-1",
+                                                                 file=(audio_filename, audio_file))
 
-    # Get file extension
-    _, file_extension = os.path.splitext(audio_filename)
+    return transcript.text
 
-    # Create a temp file with the same extension
-    with tempfile.NamedTemporaryFile(suffix=file_extension) as tmp:
-        # Download the file from S3 to the temp file
-        s3_client.download_file(bucket_name, audio_filename, tmp.name)
 
-        # Transcribe the audio file
-        with open(tmp.name, 'rb') as s3_audio_file:
-            transcript = openai.Audio.transcribe("whisper-1", file=s3_audio_file)
+async def transcribe_and_save(audio_content, audio_filename, entry_id, journal_manager) -> None:
+    """
+    Transcribes an audio file and saves the transcription to its journal entry. Run as a background task
+    :param audio_content: content of the audio file
+    :param audio_filename: name of the audio file
+    :param entry_id: id of the journal entry of the audio file
+    :param journal_manager: journal manager of the user who uploaded the audio file
+    """
+    try:
+        transcription = await gpt_whisper(audio_content, audio_filename)
 
-    return transcript
+        journal_entry = await run_in_threadpool(journal_manager.add_entry_transcription, transcription=transcription,
+                                                entry_id=entry_id)
+        if journal_entry is None:
+            logger.error('No journal entry %s to save the transcription to, File: %s', entry_id, audio_filename)
+    except Exception as e:
+        logger.error('Failed to transcribe audio: %s, File: %s', e, audio_filename)
 
 
 class ProgressTimeToday(BaseModel):
@@ -382,16 +486,16 @@ async def get_progress_time_today(current_user: Users = Depends(get_current_user
     :param current_user: The current user
     :return: progress time today
     """
-    logger.info(f"current_user: {current_user.first_name}: entered the get_progress_time_today endpoint")
+    logger.info("current_user: %s: entered the get_progress_time_today endpoint", current_user.first_name)
     try:
         journal_manager = JournalManager(current_user)
 
         today = get_current_date()
-        progress_time = journal_manager.get_progress_time(today)
+        progress_time = await run_in_threadpool(journal_manager.get_progress_time, today)
 
         return ProgressTimeToday(progress_time=progress_time)
     except Exception as e:
-        logger.error(f'Failed to get progress time today: {str(e)}, User: {current_user.first_name}')
+        logger.error('Failed to get progress time today: %s, User: %s', e, current_user.first_name)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -412,7 +516,7 @@ async def get_streak(month: int, year: int, current_user: Users = Depends(get_cu
     :param current_user: The current user.
     :return: A list of Streak objects, each representing a streak for a given day in the month.
     """
-    logger.info(f"current_user: {current_user.first_name}: entered the get_streak endpoint")
+    logger.info("current_user: %s: entered the get_streak endpoint", current_user.first_name)
     try:
         date_requested = f"01_{month}_{year}"
 
@@ -420,42 +524,50 @@ async def get_streak(month: int, year: int, current_user: Users = Depends(get_cu
 
         journal_manager = JournalManager(current_user, formatted_date)
 
-        streaks_for_the_month = journal_manager.get_streaks_for_month(month=month, year=year)
-        print(f"Streaks for the month: {streaks_for_the_month}")
+        streaks_for_the_month = await run_in_threadpool(journal_manager.get_streaks_for_month, month=month, year=year)
+        logger.debug("Streaks for the month: %s", streaks_for_the_month)
 
         return streaks_for_the_month
 
     except Exception as e:
-        logger.error(f'Failed to get streak: {str(e)}, User: {current_user.first_name}, Date: {date_requested}')
+        logger.error('Failed to get streak: %s, User: %s, Date: %s', e, current_user.first_name, date_requested)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Largest number of days that can be requested from /all_journals at once
+MAX_JOURNALS_PAGE_SIZE = 365
+
+
 class JournalDay(BaseModel):
     id: str
     date: str
     transcripts: List[Optional[str]]
 
 @app.get("/all_journals", response_model=List[JournalDay])
-async def all_journals(current_user: Users = Depends(get_current_user)) -> List[JournalDay]:
+async def all_journals(limit: Optional[int] = Query(None, ge=1, le=MAX_JOURNALS_PAGE_SIZE),
+                       before: Optional[str] = None,
+                       current_user: Users = Depends(get_current_user)) -> List[JournalDay]:
     """
         Get all the journals for the current user.
+        :param limit: The maximum number of days to return. All days if not provided.
+        :param before: Only return the days before this date, in the format of DD_MMM_YYYY. For instance,
+        '01_JAN_2023' for January 1st, 2023. Used to fetch the next page.
         :param current_user: The current user.
         :return: A list of show_month_journal objects, each representing a journal for a given day.
         """
-    logger.info(f"current_user: {current_user.first_name}: entered the all_journals endpoint")
+    logger.info("current_user: %s: entered the all_journals endpoint", current_user.first_name)
+    if before is not None and not JournalManager.is_valid_date(before):
+        raise HTTPException(status_code=400, detail="before must be in the format of DD_MMM_YYYY")
     try:
         journal_manager = JournalManager(current_user)
 
-        # Get all journal entries from the DB
-        all_journals = journal_manager.get_all_journals()
-
-        # Sort entries by date in descending order
-        all_journals.sort(key=lambda x: datetime.datetime.strptime(x['date'], '%d_%b_%Y'), reverse=True)
+        # Get the journal entries from the DB, sorted by date in descending order
+        all_journals = await run_in_threadpool(journal_manager.get_all_journals, limit=limit, before=before)
 
         return all_journals
 
     except Exception as e:
-        logger.error(f'Failed to get journals: {str(e)}, User: {current_user.first_name}')
+        logger.error('Failed to get journals: %s, User: %s', e, current_user.first_name)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -480,16 +592,16 @@ async def delete_journal(day: int, month: int, year: int,
     :param current_user: The current user.
     :return: A delete_status object, which contains the status of the delete operation.
     """
-    logger.info(f"current_user: {current_user.first_name}: entered the delete_journal endpoint")
+    logger.info("current_user: %s: entered the delete_journal endpoint", current_user.first_name)
     try:
         formatted_date = get_formatted_date(f"{day}_{month}_{year}")
 
         journal_manager = JournalManager(current_user, formatted_date)
 
-        journal_manager.delete_day_bundle(formatted_date)
+        await run_in_threadpool(journal_manager.delete_day_bundle, formatted_date)
 
         return delete_status(status="success")
 
     except Exception as e:
-        logger.error(f'Failed to delete journal: {str(e)}, User: {current_user.first_name}, Date: {formatted_date}')
+        logger.error('Failed to delete journal: %s, User: %s, Date: %s', e, current_user.first_name, formatted_date)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -2,27 +2,55 @@
 # defines the logic for interacting with the mongo database using the mongoengine library
 import calendar
 import os
+import threading
+import time
 import uuid
+from functools import lru_cache
 import certifi
-from mongoengine import connect, Document, StringField, DateTimeField, FloatField, ListField, DictField, \
-    EmbeddedDocumentField, EmbeddedDocument, EmailField
+from cachetools import TTLCache
+from mongoengine import connect, Document, StringField, DateTimeField, FloatField, IntField, ListField, DictField, \
+    EmbeddedDocumentField, EmbeddedDocument, EmailField, ObjectIdField
 from datetime import datetime
-from werkzeug.security import generate_password_hash
+from typing import Optional
 import logging
 import pytz
 
+from app.authentication import PASSWORD_HASHER
+
 # set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Connect to MongoDB
+# Maximum number of connections to MongoDB, which is also the number of threads that run database calls
+MONGO_MAX_POOL_SIZE = int(os.getenv('AUDIOBIO_MONGO_MAX_POOL_SIZE', 50))
+
+# Connect to MongoDB. The pool is sized for the concurrent requests of one uvicorn worker, and kept warm so requests
+# do not pay for a new TLS connection
 connect(
     'AudioBio_db',
     host=os.environ['AUDIOBIO_MONGO_CONNECTION_STRING'],
     tls=True,
-    tlsCAFile=certifi.where()
+    tlsCAFile=certifi.where(),
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=int(os.getenv('AUDIOBIO_MONGO_MIN_POOL_SIZE', 5)),
+    maxIdleTimeMS=30000,
+    waitQueueTimeoutMS=2500,
+    serverSelectionTimeoutMS=3000,
+    retryWrites=True
 )
 
+# Full users documents looked up by email, kept for 60 seconds so repeated lookups skip the database. Endpoints look
+# users up from the threadpool, so the cache is guarded by a lock
+user_cache = TTLCache(maxsize=1024, ttl=60)
+user_cache_lock = threading.Lock()
+
+# Case insensitive collation of the email index. Email lookups must use it too for the index to be used
+EMAIL_COLLATION = {'locale': 'en', 'strength': 2}
+
+# Upper case month abbreviations as used in the DD_MMM_YYYY journal dates, and their month numbers
+MONTH_ABBREVIATIONS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+MONTH_NUMBERS = {abbreviation: number for number, abbreviation in enumerate(MONTH_ABBREVIATIONS, 1)}
+
 
 def generate_random_id():
     """Generate a random 9 character users id from Upper Case letters and numbers"""
@@ -30,12 +58,25 @@ def generate_random_id():
     return user_id
 
 
+# The number of the current UTC day since the epoch and its formatted date, so the date is only formatted once a day
+_current_date_cache = (None, None)
+
+
 def get_current_date() -> str:
     """
     Get the current date in the format of DD_MMM_YYYY eg. 01_JAN_2021
     :return: The current date in the format of DD_MMM_YYYY eg. 01_JAN_2021
     """
-    return datetime.utcnow().strftime("%d_%b_%Y").upper()
+    global _current_date_cache
+    day_number = int(time.time() // 86400)
+    cached_day_number, cached_date = _current_date_cache
+    if cached_day_number == day_number:
+        return cached_date
+
+    today = datetime.utcfromtimestamp(day_number * 86400)
+    current_date = f"{today.day:02d}_{MONTH_ABBREVIATIONS[today.month - 1]}_{today.year}"
+    _current_date_cache = (day_number, current_date)
+    return current_date
 
 
 def get_current_date_in_user_tz(timezone_name):
@@ -46,14 +87,91 @@ def get_current_date_in_user_tz(timezone_name):
 def get_formatted_date(date: str) -> str:
     """
     Get the date in the format of DD_MMM_YYYY eg. 01_JAN_2021
-    :param date:
-    :return:
+    :param date: The date in the format of DD_MM_YYYY eg. 01_01_2021
+    :return: The date in the format of DD_MMM_YYYY eg. 01_JAN_2021
+    """
+    logger.info("entered get_formatted_date with date: %s", date)
+    day, month, year = date.split("_", 2)
+    if not 1 <= int(month) <= 12:
+        raise ValueError(f"Month must be between 1 and 12, date provided: {date}")
+    return f"{int(day):02d}_{MONTH_ABBREVIATIONS[int(month) - 1]}_{int(year)}"
+
+
+def date_sort_key(date: str) -> tuple:
+    """
+    Get a key to sort dates in the format of DD_MMM_YYYY eg. 01_JAN_2021 chronologically, without parsing them with
+    strptime
+    :param date: The date in the format of DD_MMM_YYYY eg. 01_JAN_2021
+    :return: tuple of the year, month number and day
     """
-    from datetime import datetime
-    logger.info(f"entered get_formatted_date with date: {date}")
-    # assuming date string is in the format 'DD_MM_YYYY'
-    date_obj = datetime.strptime(date, "%d_%m_%Y")
-    return date_obj.strftime("%d_%b_%Y").upper()
+    return int(date[7:]), MONTH_NUMBERS[date[3:6].upper()], int(date[:2])
+
+
+def get_date_int(date: str) -> int:
+    """
+    Get a date in the format of DD_MMM_YYYY eg. 01_JAN_2021 as a sortable YYYYMMDD integer eg. 20210101
+    :param date: The date in the format of DD_MMM_YYYY eg. 01_JAN_2021
+    :return: The date as a YYYYMMDD integer
+    """
+    year, month, day = date_sort_key(date)
+    return year * 10000 + month * 100 + day
+
+
+def get_day_id(date: str) -> str:
+    """
+    Get the id a day's journal had when it was embedded in the users, the date in the format of DD_Mmm_YYYY
+    eg. 01_Jan_2021
+    :param date: The date in the format of DD_MMM_YYYY eg. 01_JAN_2021
+    :return: The date in the format of DD_Mmm_YYYY eg. 01_Jan_2021
+    """
+    return f"{date[:3]}{date[3:6].title()}{date[6:]}"
+
+
+@lru_cache(maxsize=64)
+def get_month_dates(year: int, month: int) -> tuple:
+    """
+    Get every date of a month, without a Calendar or strftime. Cached as the dates of a month never change
+    :param year: The year in the format of YYYY
+    :param month: The month in the format of M eg. 1 for January
+    :return: tuple of the date in the format of DD_MMM_YYYY eg. 01_JAN_2021 and in the format of DD_Mmm_YYYY
+    eg. 01_Jan_2021 for each day of the month
+    """
+    month_abbreviation = MONTH_ABBREVIATIONS[month - 1]
+    return tuple(
+        (f"{day:02d}_{month_abbreviation}_{year}", f"{day:02d}_{month_abbreviation.title()}_{year}")
+        for day in range(1, calendar.monthrange(year, month)[1] + 1)
+    )
+
+
+def invalidate_cached_user(email) -> None:
+    """
+    Remove a users from the cache of users looked up by email
+    :param email: The email of the users
+    """
+    with user_cache_lock:
+        user_cache.pop(email.lower(), None)
+
+
+def migrate_legacy_journal(user) -> None:
+    """
+    Move the days still embedded in the users' journal field to DayBundle, then remove the journal field. Days that
+    already exist in DayBundle are left as they are, so it is safe to run more than once
+    :param user: The users object, including the journal
+    """
+    logger.info("Moving %s legacy journal days of users %s to DayBundle", len(user.journal), user.id)
+    collection = DayBundle._get_collection()
+    for date, day_entry in user.journal.items():
+        day_bundle = day_entry.to_mongo()
+        # the legacy id is returned as the id of the day by /all_journals, so keep it
+        day_bundle['day_id'] = day_bundle.pop('id', None) or get_day_id(date)
+        day_bundle['user_id'] = user.id
+        day_bundle['date'] = date
+        day_bundle['date_int'] = day_entry.date_int or get_date_int(date)
+        day_bundle['total_seconds'] = sum(entry.recording_length_in_seconds or 0 for entry in day_entry.entries)
+        collection.update_one({'user_id': user.id, 'date': date}, {'$setOnInsert': day_bundle}, upsert=True)
+
+    Users._get_collection().update_one({'_id': user.id}, {'$unset': {'journal': ''}})
+    user.journal = {}
 
 
 class JournalEntry(EmbeddedDocument):
@@ -72,22 +190,56 @@ class DayEntryBundle(EmbeddedDocument):
     """
     A collection of journal entries for a single day that contain the summarized daily journal entry and the
     individual journal entries for the day
+
+    Legacy: only used to read journals still embedded in Users.journal, which are moved to DayBundle when the users is
+    loaded
     """
     id = StringField(required=True, default=lambda: datetime.utcnow().strftime("%d_%b_%Y"), unique=True)
     title = StringField(required=True, default=lambda: datetime.utcnow().strftime("%d-%b-%Y"))
+    date_int = IntField()
+    summary = StringField()
+    processed_entry = StringField()
+    entries = ListField(EmbeddedDocumentField(JournalEntry))
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+
+class DayBundle(Document):
+    """
+    A collection of journal entries for a single day of a single users that contain the summarized daily journal entry
+    and the individual journal entries for the day. Stored in its own collection so adding an entry only writes that day
+    """
+    user_id = ObjectIdField(required=True)
+    date = StringField(required=True)
+    date_int = IntField(required=True)
+    # id of the day when it was embedded in the users, eg. 01_Jan_2021. Unset for days added since, whose id is
+    # get_day_id(date)
+    day_id = StringField()
+    title = StringField(required=True, default=lambda: datetime.utcnow().strftime("%d-%b-%Y"))
     summary = StringField()
     processed_entry = StringField()
     entries = ListField(EmbeddedDocumentField(JournalEntry))
+    # running total of recording_length_in_seconds of the entries, kept up to date as entries are added
+    total_seconds = FloatField(default=0.0)
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
 
+    meta = {
+        'collection': 'day_bundles',
+        'indexes': [
+            {'fields': ['user_id', 'date'], 'unique': True},
+            ('user_id', '-date_int'),
+        ]
+    }
+
 
 class Users(Document):
     """
-    A users that has a unique id and email. Within the users, there is a collection of journal entries organized by day
+    A users that has a unique id and email. The users' journal entries are organized by day in DayBundle. The journal
+    field only holds days that have not been moved to DayBundle yet
     """
     # id = StringField(required=True, default=generate_random_id)
-    email = EmailField(required=True, unique=True)
+    email = EmailField(required=True)
     _hashed_password = StringField(required=True, min_length=5, max_length=255)
     first_name = StringField(required=True, min_length=2, max_length=100)
     last_name = StringField(min_length=2, max_length=100)
@@ -95,9 +247,16 @@ class Users(Document):
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
 
+    meta = {'indexes': [
+        {'fields': ['email'], 'unique': True, 'collation': EMAIL_COLLATION, 'name': 'email_case_insensitive'},
+        'created_at',
+    ]}
+
     def save(self, *args, **kwargs):
         self.updated_at = datetime.utcnow()
-        return super(Users, self).save(*args, **kwargs)
+        saved_user = super(Users, self).save(*args, **kwargs)
+        invalidate_cached_user(self.email)
+        return saved_user
 
     @property
     def password(self) -> str:
@@ -106,7 +265,7 @@ class Users(Document):
     @password.setter
     def password(self, password) -> None:
         """Create hashed password."""
-        self._hashed_password = generate_password_hash(password, method='scrypt')
+        self._hashed_password = PASSWORD_HASHER.hash(password)
 
     @property
     def hashed_password(self) -> str:
@@ -119,8 +278,32 @@ class UserManager:
     """
 
     @staticmethod
-    def find_user_by_email(email):
-        return Users.objects(email=email).first()
+    def find_user_for_auth(email):
+        """
+        Find a users by email without loading the journal. Use when only the credentials and name are needed
+        :param email: The email of the users
+        :return: The users object without the journal, or None if there is no users with that email
+        """
+        return Users.objects(email=email).collation(EMAIL_COLLATION) \
+            .only('email', '_hashed_password', 'first_name', 'last_name').first()
+
+    @staticmethod
+    def find_user_full(email):
+        """
+        Find a users by email, including the journal. Found users are cached for a short time
+        :param email: The email of the users
+        :return: The users object, or None if there is no users with that email
+        """
+        with user_cache_lock:
+            user = user_cache.get(email.lower())
+        if user is None:
+            user = Users.objects(email=email).collation(EMAIL_COLLATION).first()
+            if user is not None:
+                if user.journal:
+                    migrate_legacy_journal(user)
+                with user_cache_lock:
+                    user_cache[email.lower()] = user
+        return user
 
     @staticmethod
     def create_user(email, password, first_name, last_name) -> Users:
@@ -136,73 +319,132 @@ class UserManager:
         user = Users(email=email, first_name=first_name, last_name=last_name)
         user.password = password
         user.save()
+        invalidate_cached_user(email)
         return user
 
 
 class JournalManager:
     """
     A class that contains the logic for interacting with the Journal model
-    :param user: The Journal object eg Users.journal
-    :param date: The date of the journal entry in the format of DD_MMM_YYYY eg. 01_JAN_2021
+
+    Used as a context manager, the entries added inside the with block are kept in memory, along with any
+    transcriptions saved for them, and written in a single update when the block exits:
+
+        with JournalManager(user) as journal_manager:
+            journal_manager.add_journal_entry(...)
+            journal_manager.add_entry_transcription(...)
+
+    :param user: The users object whose journal is managed
+    :param date: The date of the journal entry in the format of DD_MMM_YYYY eg. 01_JAN_2021. Defaults to today
     """
 
-    def __init__(self, user: Users, date: str = get_current_date()):
+    def __init__(self, user: Users, date: Optional[str] = None):
+        if date is None:
+            date = get_current_date()
         if not self.is_valid_date(date):
             raise ValueError(f"Date must be in 'DD_MMM_YYYY' format, date provided: {date}")
         self.user = user
-        self.journal = user.journal
         self.date = date
+        # entries waiting to be written on exit, None when not used as a context manager
+        self._pending_entries = None
+
+    def __enter__(self):
+        self._pending_entries = []
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pending_entries, self._pending_entries = self._pending_entries, None
+        if exc_type is None and pending_entries:
+            self._push_entries(pending_entries)
+        return False
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def is_valid_date(date: str) -> bool:
-        try:
-            # Try to parse the date string. If it's in the correct format,
-            # this will succeed; otherwise, it will raise a ValueError
-            datetime.strptime(date, "%d_%b_%Y")
-            return date == date.upper()
-        except ValueError:
+        """
+        Check that a date is in the format of DD_MMM_YYYY eg. 01_JAN_2021 and is a real day, without strptime
+        :param date: The date to check
+        :return: True if the date is valid, else False
+        """
+        parts = date.split("_")
+        if len(parts) != 3:
+            return False
+        day, month, year = parts
+        # isdigit would also accept characters such as '²' that int() cannot parse
+        if len(day) != 2 or len(year) != 4 or month not in MONTH_NUMBERS:
             return False
+        if not (day.isascii() and day.isdecimal() and year.isascii() and year.isdecimal()):
+            return False
+        return 1 <= int(day) <= calendar.monthrange(int(year), MONTH_NUMBERS[month])[1]
 
-    def add_journal_entry(self, recording_file_name, recording_seconds) -> (DayEntryBundle, JournalEntry):
+    def add_journal_entry(self, recording_file_name, recording_seconds) -> (DayBundle, JournalEntry):
         """
         Creates a new journal entry for the users for that day if one does not already exist then adds a new single
-        journal entry to the day journal bundle
+        journal entry to the day journal bundle. Only the day's bundle is written
         :param recording_file_name: The name of the audio file
-        :param transcription: The transcription of the audio file
-        :return: tuple of the day journal entry and the single journal entry that has just been added
+        :param recording_seconds: The length of the audio file in seconds
+        :return: tuple of the day journal entry and the single journal entry that has just been added. Inside a with
+        block the entry is only written on exit, so the day journal entry is None
         """
-        today = get_current_date()
-        if today not in self.journal:
-            self.journal[today] = DayEntryBundle()
         journal_entry = JournalEntry(recording_file_name=recording_file_name,
                                      recording_length_in_seconds=recording_seconds)
-        self.journal[today].entries.append(journal_entry)
-        self.user.save()
+        if self._pending_entries is not None:
+            self._pending_entries.append(journal_entry)
+            return None, journal_entry
 
-        return self.journal[today], journal_entry
+        return self._push_entries([journal_entry]), journal_entry
 
-    def add_entry_transcription(self, transcription, entry_id) -> JournalEntry:
+    def _push_entries(self, journal_entries: list) -> DayBundle:
         """
-        Save the transcription for a journal entry
-        :param journal_entry_object: The journal entry object
-        :param transcription: The transcription of the audio file
-        :return: The updated journal entry
+        Add journal entries to today's day bundle, creating it if it does not exist yet, in a single update
+        :param journal_entries: list of the journal entries to add
+        :return: The updated day bundle
         """
         today = get_current_date()
+        now = datetime.utcnow()
+
+        return DayBundle.objects(user_id=self.user.id, date=today).modify(
+            upsert=True,
+            new=True,
+            push_all__entries=journal_entries,
+            inc__total_seconds=sum(entry.recording_length_in_seconds or 0 for entry in journal_entries),
+            set__updated_at=now,
+            set_on_insert__date_int=get_date_int(today),
+            set_on_insert__title=now.strftime("%d-%b-%Y"),
+            set_on_insert__created_at=now,
+        )
 
-        # for entry in self.user.journal[today].entries:
-        #     if entry.id == entry_id:
-        #         journal_entry = entry
-        #         break
-        day_bundle = self.user.journal[today]
-
-        # iterate through the day bundle and find the entry with the matching id. If no entry is found, return None
-        journal_entry = next((entry for entry in day_bundle.entries if entry.id == entry_id), None)
-
-        journal_entry.transcription = transcription
-        self.user.save()
-
-        return journal_entry
+    def add_entry_transcription(self, transcription, entry_id) -> JournalEntry:
+        """
+        Save the transcription for a journal entry. Only the transcription is written, or nothing if the entry is
+        still waiting to be written on exit of a with block
+        :param transcription: The transcription of the audio file
+        :param entry_id: The id of the journal entry
+        :return: The updated journal entry, or None if there is no entry with that id
+        """
+        if self._pending_entries is not None:
+            journal_entry = next((entry for entry in self._pending_entries if entry.id == entry_id), None)
+            if journal_entry is not None:
+                journal_entry.transcription = transcription
+                return journal_entry
+
+        now = datetime.utcnow()
+
+        # set the transcription of the entry with the matching id in place with the positional operator, and only
+        # return that entry of the day bundle. The entry id is enough to find the day, which may no longer be today
+        # when the transcription finishes after midnight UTC
+        day_bundle = DayBundle.objects(user_id=self.user.id, entries__id=entry_id) \
+            .fields(elemMatch__entries={'id': entry_id}) \
+            .modify(
+                new=True,
+                set__entries__S__transcription=transcription,
+                set__entries__S__updated_at=now,
+                set__updated_at=now,
+            )
+        if day_bundle is None or not day_bundle.entries:
+            return None
+
+        return day_bundle.entries[0]
 
     def get_progress_time(self, date_requested=None):
         """
@@ -212,9 +454,31 @@ class JournalManager:
         if date_requested is None:
             date_requested = self.date
 
-        if date_requested not in self.journal:
-            return 0
-        return sum([entry.recording_length_in_seconds for entry in self.journal[date_requested].entries])
+        return self.get_progress_times([date_requested])[date_requested]
+
+    def get_progress_times(self, dates: list) -> dict:
+        """
+        Get the total time of the journal entries for each of the requested days in a single query. Only the stored
+        totals are sent back rather than the entries
+        :param dates: list of dates in the format of DD_MMM_YYYY eg. 01_JAN_2021
+        :return: dict of each date and its total time, 0 for days without journal entries
+        """
+        day_bundles = DayBundle.objects(user_id=self.user.id, date__in=dates).only('date', 'total_seconds')
+        progress_times = {day_bundle.date: day_bundle.total_seconds for day_bundle in day_bundles}
+        return {date: progress_times.get(date, 0) for date in dates}
+
+    @staticmethod
+    def bulk_progress_for_date(user_ids: list, date: str) -> dict:
+        """
+        Get the total time of the journal entries of many users for a single day in one query, rather than creating a
+        JournalManager per users
+        :param user_ids: list of the ids of the users
+        :param date: The date in the format of DD_MMM_YYYY eg. 01_JAN_2021
+        :return: dict of each users id, as a string, and its total time, 0 for users without journal entries that day
+        """
+        day_bundles = DayBundle.objects(user_id__in=user_ids, date=date).only('user_id', 'total_seconds')
+        progress_times = {str(day_bundle.user_id): day_bundle.total_seconds for day_bundle in day_bundles}
+        return {str(user_id): progress_times.get(str(user_id), 0) for user_id in user_ids}
 
     def get_streaks_for_month(self, month, year) -> list:
         """
@@ -223,17 +487,10 @@ class JournalManager:
         :param year: The year in the format of YYYY
         :return: list of the date and the progress times for each day in the month
         """
+        month_dates = get_month_dates(year, month)
+        progress_times = self.get_progress_times([date for date, _ in month_dates])
 
-        streaks = []
-        for day in calendar.Calendar().itermonthdates(year, month):
-            if day.month == month:
-                formatted_date = day.strftime("%d_%b_%Y").upper()
-                streaks.append({
-                    "date": day.strftime("%d_%b_%Y"),
-                    "progress_time": self.get_progress_time(date_requested=formatted_date)
-                })
-        return streaks
-
+        return [{"date": display_date, "progress_time": progress_times[date]} for date, display_date in month_dates]
 
     def get_journal_entries_for_day(self, date_requested=None) -> list:
         """
@@ -243,30 +500,46 @@ class JournalManager:
         if date_requested is None:
             date_requested = self.date
 
-        if date_requested not in self.journal:
+        day_bundle = DayBundle.objects(user_id=self.user.id, date=date_requested).only('entries.transcription').first()
+        if day_bundle is None:
             return []
         # extract the individual transcriptions from the journal entries
-        return [entry.transcription for entry in self.journal[date_requested].entries]
+        return [entry.transcription for entry in day_bundle.entries]
 
-    def get_all_journals(self):
+    def iter_journals(self, limit: Optional[int] = None, before: Optional[str] = None):
+        """
+        Iterate over the journal entries of the current user, newest first, one day at a time. Sorted by MongoDB with
+        the (user_id, date_int) index
+        :param limit: The maximum number of days to return. All days if None
+        :param before: Only return days before this date, in the format of DD_MMM_YYYY eg. 01_JAN_2021
+        :return: generator of dictionaries, each representing a journal for a given day.
+        """
+        day_bundles = DayBundle.objects(user_id=self.user.id)
+        if before is not None:
+            day_bundles = day_bundles.filter(date_int__lt=get_date_int(before))
+        day_bundles = day_bundles.order_by('-date_int').only('date', 'day_id', 'entries.transcription')
+        if limit is not None:
+            day_bundles = day_bundles.limit(limit)
+
+        for day_bundle in day_bundles:
+            yield {
+                "id": day_bundle.day_id or get_day_id(day_bundle.date),
+                "date": day_bundle.date,
+                "transcripts": [entry.transcription for entry in day_bundle.entries]
+            }
+
+    def get_all_journals(self, limit: Optional[int] = None, before: Optional[str] = None):
         """
-        Get all journal entries for the current user.
+        Get all journal entries for the current user, newest first.
+        :param limit: The maximum number of days to return. All days if None
+        :param before: Only return days before this date, in the format of DD_MMM_YYYY eg. 01_JAN_2021
         :return: A list of dictionaries, each representing a journal for a given day.
         """
-        logger.info(f"Entered the get_all_journals method")
-        journals = []
-        for day, day_entry in self.journal.items():
-            journals.append({
-                "id": day_entry.id,
-                "date": day,
-                "transcripts": [entry.transcription for entry in day_entry.entries]
-            })
-
-        logger.info(f"Left the get all journals method. Returning the journals: {journals}")
+        logger.info("Entered the get_all_journals method")
+        journals = list(self.iter_journals(limit=limit, before=before))
+        logger.info("Left the get all journals method. Returning %d journals", len(journals))
         return journals
 
-
-
     def delete_day_bundle(self, date_requested):
         """
         Delete the day bundle for the requested date
@@ -274,8 +547,14 @@ class JournalManager:
         """
 
         try:
-            del self.journal[date_requested]
-            self.user.save()
+            DayBundle.objects(user_id=self.user.id, date=date_requested).delete()
         except Exception as e:
             raise e
 
+    def delete_day_bundles(self, dates_requested: list) -> int:
+        """
+        Delete the day bundles for all the requested dates in a single delete, eg. to clear a month
+        :param dates_requested: list of the dates of the day bundles to be deleted
+        :return: The number of day bundles deleted
+        """
+        return DayBundle.objects(user_id=self.user.id, date__in=dates_requested).delete()
@@ -0,0 +1,9 @@
+import os
+
+# The app modules read their configuration from the environment at import time, so give the tests safe defaults
+os.environ.setdefault('AUDIOBIO_MONGO_CONNECTION_STRING', 'mongodb://localhost')
+os.environ.setdefault('_AWS_ACCESS_KEY_ID_AUDIOBIO', 'testing')
+os.environ.setdefault('_AWS_SECRET_ACCESS_KEY_AUDIOBIO', 'testing')
+os.environ.setdefault('OPENAI_API_KEY', 'testing')
+os.environ.setdefault('AUDIOBIO_JWT_ALGORITHM', 'HS256')
+os.environ.setdefault('AUDIOBIO_SECRET_AUTH_KEY', 'testing-secret')
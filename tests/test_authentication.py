@@ -1,8 +1,11 @@
 from mongomock import MongoClient
 import unittest
 import pytest
-from app.authentication import AuthenticationService
+from app.authentication import AuthenticationService, PASSWORD_HASHER
+import bcrypt
 import hashlib
+import time
+import jwt
 from fastapi import HTTPException
 
 
@@ -40,3 +43,68 @@ class TestAuthenticationService(unittest.TestCase):
 
         with pytest.raises(HTTPException):
             self.auth_service.authenticate("test", "wrong_password")
+
+
+def make_legacy_scrypt_hash(password: str, salt: str = "saltsaltsaltsalt", n: int = 16384, r: int = 8,
+                            p: int = 1) -> str:
+    """Build a hash in werkzeug's scrypt format, scrypt:N:r:p$salt$hex_hash"""
+    hashed = hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=132 * n * r * p).hex()
+    return f"scrypt:{n}:{r}:{p}${salt}${hashed}"
+
+
+class TestVerifyPassword(unittest.TestCase):
+
+    def test_argon2_hash(self):
+        database_password = PASSWORD_HASHER.hash("test_password")
+        self.assertTrue(database_password.startswith("$argon2id$"))
+        self.assertTrue(AuthenticationService.verify_password("test_password", database_password))
+        self.assertFalse(AuthenticationService.verify_password("wrong_password", database_password))
+
+    def test_bcrypt_hash(self):
+        database_password = bcrypt.hashpw(b"test_password", bcrypt.gensalt(rounds=4)).decode()
+        self.assertTrue(AuthenticationService.verify_password("test_password", database_password))
+        self.assertFalse(AuthenticationService.verify_password("wrong_password", database_password))
+
+    def test_legacy_scrypt_hash(self):
+        database_password = make_legacy_scrypt_hash("test_password")
+        self.assertTrue(AuthenticationService.verify_password("test_password", database_password))
+        self.assertFalse(AuthenticationService.verify_password("wrong_password", database_password))
+
+    def test_malformed_argon2_hash(self):
+        self.assertFalse(AuthenticationService.verify_password("test_password", "$argon2id$not-a-hash"))
+
+    def test_malformed_legacy_scrypt_hash(self):
+        for database_password in ("scrypt:bad", "scrypt:16384:8$salt$abcd", "scrypt:a:b:c$salt$abcd"):
+            with self.subTest(database_password=database_password):
+                self.assertFalse(AuthenticationService.verify_password("test_password", database_password))
+
+    def test_unknown_hash_format(self):
+        for database_password in ("", "test_password", hashlib.sha256(b"test_password").hexdigest(),
+                                  "pbkdf2:sha256:600000$salt$abcd"):
+            with self.subTest(database_password=database_password):
+                self.assertFalse(AuthenticationService.verify_password("test_password", database_password))
+
+
+class TestTokens(unittest.TestCase):
+
+    def test_create_token_round_trip(self):
+        token = AuthenticationService(user=None).create_token("test@example.com")
+
+        payload = AuthenticationService.decode_token(token)
+
+        self.assertEqual(payload["sub"], "test@example.com")
+        self.assertGreater(payload["exp"], time.time())
+
+    def test_expired_token(self):
+        token = AuthenticationService(user=None, token_expire_minutes=-1).create_token("test@example.com")
+
+        with pytest.raises(jwt.ExpiredSignatureError):
+            AuthenticationService.decode_token(token)
+
+    def test_tampered_token(self):
+        token = AuthenticationService(user=None).create_token("test@example.com")
+        header, payload, signature = token.split(".")
+        tampered_signature = ("A" if signature[0] != "A" else "B") + signature[1:]
+
+        with pytest.raises(jwt.InvalidSignatureError):
+            AuthenticationService.decode_token(".".join((header, payload, tampered_signature)))
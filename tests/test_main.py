@@ -1,7 +1,13 @@
+import asyncio
+import io
 import logging
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
-from app.main import handle_upload, upload_to_s3, gpt_whisper
+from unittest.mock import patch, MagicMock, AsyncMock
+import wave
+from app.main import app, upload_to_s3, gpt_whisper, get_current_user, auth_cache, clear_auth_cache
+from app.authentication import AuthenticationService
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
 import boto3
 from moto import mock_s3
 from botocore.exceptions import BotoCoreError, ClientError
@@ -10,30 +16,21 @@ from botocore.exceptions import BotoCoreError, ClientError
 
 class TestMain(unittest.TestCase):
 
-    @patch('tempfile.NamedTemporaryFile')
-    @patch('builtins.open', new_callable=mock_open, read_data=b'audio file content')
-    def test_handle_upload(self, mock_open_file, mock_tempfile):
-        content = b'audio file content'
-
-        mock_file = MagicMock()
-        mock_file.__enter__.return_value.name = 'tempfile_name'  # Update this line
-        mock_file.__enter__.return_value.read.return_value = content
-        mock_file.__enter__.return_value.__iter__ = MagicMock(return_value=iter([content]))
-        mock_file.__enter__.return_value.tell = MagicMock(return_value=len(content))
-        mock_tempfile.return_value = mock_file
+    @patch('app.main.s3')
+    def test_upload_to_s3(self, mock_s3_client):
+        mock_s3_client.put_object = AsyncMock()
 
+        audio_content = b'audio file content'
         filename = 'test_file.mp3'
 
-        result_filename, result_tmp_name = handle_upload(filename, content)
+        result = asyncio.run(upload_to_s3(audio_content, filename))
 
-        # Updated assertions
-        self.assertIsInstance(result_filename, str)
-        self.assertNotEqual(result_filename, '')
-        self.assertIsInstance(result_tmp_name, str)
-        self.assertNotEqual(result_tmp_name, '')
+        self.assertEqual(result, filename)
+        mock_s3_client.put_object.assert_awaited_once_with(Bucket='audiobio-recordings', Key=filename,
+                                                           Body=audio_content)
 
     @mock_s3
-    def test_upload_to_s3(self):
+    def test_put_object_to_s3(self):
         # Set up the mock S3.
         s3_client = boto3.client('s3', region_name='us-east-1')
         s3_client.create_bucket(Bucket='mybucket')
@@ -43,14 +40,9 @@ class TestMain(unittest.TestCase):
         print("Buckets: ", buckets)
 
         filename = 'test_file.mp3'
-        tmp_name = '/tmp/tempfile_name'
-        # Write a temp file to upload
-        with open(tmp_name, 'wb') as f:
-            f.write(b'test content')
 
-        # Here we directly put the file to S3
-        with open(tmp_name, 'rb') as data:
-            s3_client.put_object(Bucket='mybucket', Key=filename, Body=data)
+        # Here we directly put the content to S3
+        s3_client.put_object(Bucket='mybucket', Key=filename, Body=b'test content')
 
         # Try to get the object we just put in S3.
         try:
@@ -60,33 +52,154 @@ class TestMain(unittest.TestCase):
             logging.error(e)
             print(f"Error occurred while retrieving {filename}.")
 
-    @patch('openai.Audio.transcribe')
-    @patch('boto3.client')
-    @patch('tempfile.NamedTemporaryFile')
-    @patch('builtins.open', new_callable=mock_open, read_data=b'audio file content')
-    def test_gpt_whisper(self, mock_open_file, mock_tempfile, mock_boto3_client, mock_transcribe):
-        content = b'some data'
+    @patch('app.main.openai_client')
+    def test_gpt_whisper(self, mock_openai_client):
+        audio_file = io.BytesIO(b'some data')
+        mock_openai_client.audio.transcriptions.create = AsyncMock(return_value=MagicMock(text='transcript'))
 
-        mock_file = MagicMock()
-        mock_file.name = '/tmp/tempfile'
-        mock_file.__enter__.return_value.read.return_value = content
-        mock_file.__enter__.return_value.__iter__ = MagicMock(return_value=iter([content]))
-        mock_file.__enter__.return_value.tell = MagicMock(return_value=len(content))
-        mock_tempfile.return_value = mock_file
+        filename = 'test_file.mp3'
 
-        mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
+        result = asyncio.run(gpt_whisper(audio_file, filename))
+        self.assertEqual(result, 'transcript')
 
-        mock_transcribe.return_value = 'transcript'
+        mock_openai_client.audio.transcriptions.create.assert_awaited_once_with(
+            model="whisper-1", file=(filename, audio_file)
+        )
 
-        bucket_name = 'audiobio-recordings'
-        filename = 'test_file.mp3'
 
-        result = gpt_whisper(mock_s3_client, bucket_name, filename)
-        self.assertEqual(result, 'transcript')
+class TestGetCurrentUser(unittest.TestCase):
+
+    def setUp(self):
+        clear_auth_cache()
+        self.addCleanup(clear_auth_cache)
+        self.user = MagicMock(email='test@example.com')
+
+    @patch('app.main.UserManager.find_user_full')
+    def test_cache_miss_then_hit(self, mock_find_user_full):
+        mock_find_user_full.return_value = self.user
+        token = AuthenticationService(user=None).create_token('test@example.com')
+
+        self.assertIs(asyncio.run(get_current_user(token)), self.user)
+        self.assertIs(asyncio.run(get_current_user(token)), self.user)
+
+        mock_find_user_full.assert_called_once_with(email='test@example.com')
+        self.assertEqual(len(auth_cache), 1)
+
+    @patch('app.main.UserManager.find_user_full')
+    def test_cleared_cache_looks_user_up_again(self, mock_find_user_full):
+        mock_find_user_full.return_value = self.user
+        token = AuthenticationService(user=None).create_token('test@example.com')
+
+        asyncio.run(get_current_user(token))
+        clear_auth_cache()
+        asyncio.run(get_current_user(token))
+
+        self.assertEqual(mock_find_user_full.call_count, 2)
+
+    @patch('app.main.UserManager.find_user_full')
+    def test_invalid_token_is_not_cached(self, mock_find_user_full):
+        with self.assertRaises(HTTPException) as context:
+            asyncio.run(get_current_user('not-a-token'))
+
+        self.assertEqual(context.exception.status_code, 401)
+        mock_find_user_full.assert_not_called()
+        self.assertEqual(len(auth_cache), 0)
+
+    @patch('app.main.UserManager.find_user_full')
+    def test_expired_token_is_not_cached(self, mock_find_user_full):
+        token = AuthenticationService(user=None, token_expire_minutes=-1).create_token('test@example.com')
+
+        with self.assertRaises(HTTPException) as context:
+            asyncio.run(get_current_user(token))
+
+        self.assertEqual(context.exception.status_code, 401)
+        mock_find_user_full.assert_not_called()
+        self.assertEqual(len(auth_cache), 0)
+
+    @patch('app.main.UserManager.find_user_full')
+    def test_unknown_user_is_not_cached(self, mock_find_user_full):
+        mock_find_user_full.return_value = None
+        token = AuthenticationService(user=None).create_token('missing@example.com')
+
+        with self.assertRaises(HTTPException) as context:
+            asyncio.run(get_current_user(token))
+
+        self.assertEqual(context.exception.status_code, 401)
+        self.assertEqual(len(auth_cache), 0)
+
+
+def make_wav_content() -> bytes:
+    """Build the content of a short, silent WAV file"""
+    wav_file = io.BytesIO()
+    with wave.open(wav_file, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(b'\0' * 1600)
+    return wav_file.getvalue()
+
+
+class TestUploadAudio(unittest.TestCase):
+
+    def setUp(self):
+        app.dependency_overrides[get_current_user] = lambda: MagicMock(first_name='Test')
+        self.addCleanup(app.dependency_overrides.clear)
+
+        s3_patcher = patch('app.main.s3')
+        self.mock_s3_client = s3_patcher.start()
+        self.mock_s3_client.put_object = AsyncMock()
+        self.addCleanup(s3_patcher.stop)
+
+        openai_patcher = patch('app.main.openai_client')
+        self.mock_openai_client = openai_patcher.start()
+        self.mock_openai_client.audio.transcriptions.create = AsyncMock(return_value=MagicMock(text='transcript'))
+        self.addCleanup(openai_patcher.stop)
+
+        journal_manager_patcher = patch('app.main.JournalManager')
+        self.mock_journal_manager = journal_manager_patcher.start().return_value
+        self.mock_journal_manager.add_journal_entry.return_value = (None, MagicMock(id='ENTRY1234'))
+        self.addCleanup(journal_manager_patcher.stop)
+
+        # startup is not run, so the patched S3 client is not replaced by a real one
+        self.client = TestClient(app)
+
+    def upload(self, filename, content):
+        return self.client.post('/upload/', files={'audio': (filename, content)}, data={'length_in_seconds': '12.5'})
+
+    def test_wav_accepted(self):
+        wav_content = make_wav_content()
+
+        response = self.upload('rec.wav', wav_content)
+
+        self.assertEqual(response.status_code, 200)
+        audio_filename = response.json()['filename']
+        self.assertTrue(audio_filename.startswith('AudioBio_Recording_'))
+        self.assertTrue(audio_filename.endswith('.wav'))
+        self.mock_s3_client.put_object.assert_awaited_once_with(Bucket='audiobio-recordings', Key=audio_filename,
+                                                                Body=wav_content)
+        self.mock_journal_manager.add_journal_entry.assert_called_once_with(recording_file_name=audio_filename,
+                                                                           recording_seconds=12.5)
+        self.mock_openai_client.audio.transcriptions.create.assert_awaited_once_with(
+            model="whisper-1", file=(audio_filename, wav_content)
+        )
+        self.mock_journal_manager.add_entry_transcription.assert_called_once_with(transcription='transcript',
+                                                                                  entry_id='ENTRY1234')
+
+    def test_disallowed_extension_rejected(self):
+        response = self.upload('rec.txt', make_wav_content())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], 'Invalid file type')
+        self.mock_s3_client.put_object.assert_not_awaited()
+
+    def test_text_content_with_audio_extension_rejected(self):
+        response = self.upload('rec.wav', b'this is not a recording, just some text')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], 'Invalid file type')
+        self.mock_s3_client.put_object.assert_not_awaited()
+        self.mock_journal_manager.add_journal_entry.assert_not_called()
 
-        mock_s3_client.download_file.assert_called_once()
-        mock_transcribe.assert_called_once()
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,324 @@
+import calendar
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from mongoengine import connect, disconnect
+
+from app.mongo_db_logic import DayBundle, DayEntryBundle, JournalEntry, JournalManager, Users, get_current_date, \
+    get_date_int, get_formatted_date, get_month_dates, migrate_legacy_journal
+
+
+class TestDates(unittest.TestCase):
+
+    def test_is_valid_date(self):
+        cases = [
+            ('01_JAN_2021', True),
+            ('31_DEC_2021', True),
+            ('29_FEB_2024', True),
+            ('29_FEB_2021', False),
+            ('31_APR_2021', False),
+            ('00_JAN_2021', False),
+            ('1_JAN_2021', False),
+            ('01_Jan_2021', False),
+            ('01_jan_2021', False),
+            ('01_JANUARY_2021', False),
+            ('0\u00b2_JAN_2023', False),
+            ('\u0661\u0662_JAN_2023', False),
+            ('01_JAN_\u0662\u0660\u0662\u0663', False),
+            ('01_JAN_21', False),
+            ('01-JAN-2021', False),
+            ('01_JAN_2021_X', False),
+            ('', False),
+        ]
+        for date, expected in cases:
+            with self.subTest(date=date):
+                self.assertIs(JournalManager.is_valid_date(date), expected)
+
+    def test_journal_manager_rejects_invalid_date(self):
+        with self.assertRaises(ValueError):
+            JournalManager(user=None, date='29_FEB_2021')
+
+    def test_get_formatted_date(self):
+        cases = [
+            ('01_01_2021', '01_JAN_2021'),
+            ('1_1_2021', '01_JAN_2021'),
+            ('29_02_2024', '29_FEB_2024'),
+            ('31_12_2021', '31_DEC_2021'),
+        ]
+        for date, expected in cases:
+            with self.subTest(date=date):
+                self.assertEqual(get_formatted_date(date), expected)
+                self.assertEqual(get_formatted_date(date),
+                                 datetime.strptime(date, '%d_%m_%Y').strftime('%d_%b_%Y').upper())
+
+    def test_get_formatted_date_invalid_month(self):
+        for date in ('01_00_2021', '01_13_2021'):
+            with self.subTest(date=date):
+                with self.assertRaises(ValueError):
+                    get_formatted_date(date)
+
+    def test_get_month_dates(self):
+        for year, month in ((2021, 1), (2021, 2), (2024, 2), (2021, 4), (2021, 12)):
+            with self.subTest(year=year, month=month):
+                expected = []
+                day = datetime(year, month, 1)
+                while day.month == month:
+                    expected.append((day.strftime('%d_%b_%Y').upper(), day.strftime('%d_%b_%Y')))
+                    day = datetime.fromordinal(day.toordinal() + 1)
+                self.assertEqual(get_month_dates(year, month), tuple(expected))
+
+    def test_get_current_date(self):
+        self.assertEqual(get_current_date(), datetime.utcnow().strftime('%d_%b_%Y').upper())
+
+    @patch('app.mongo_db_logic.time.time')
+    def test_get_current_date_changes_at_midnight_utc(self, mock_time):
+        mock_time.return_value = calendar.timegm((2024, 2, 28, 23, 59, 59))
+        self.assertEqual(get_current_date(), '28_FEB_2024')
+
+        mock_time.return_value = calendar.timegm((2024, 2, 29, 0, 0, 0))
+        self.assertEqual(get_current_date(), '29_FEB_2024')
+
+
+class MongoTestCase(unittest.TestCase):
+    """Runs each test against a fresh in-memory mongomock database rather than the real cluster"""
+
+    @classmethod
+    def setUpClass(cls):
+        disconnect()
+        connect('AudioBio_db', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+
+    @classmethod
+    def tearDownClass(cls):
+        disconnect()
+
+    def setUp(self):
+        DayBundle.drop_collection()
+        Users.drop_collection()
+        self.user = Users(id=ObjectId(), email='test@example.com', first_name='Test', last_name='User')
+
+
+class TestMigrateLegacyJournal(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user.journal = {
+            '01_JAN_2021': DayEntryBundle(id='01_Jan_2021', entries=[
+                JournalEntry(recording_file_name='a.mp3', recording_length_in_seconds=10, transcription='first'),
+                JournalEntry(recording_file_name='b.mp3', recording_length_in_seconds=5.5, transcription='second'),
+            ]),
+            '02_JAN_2021': DayEntryBundle(id='02_Jan_2021', date_int=20210102, entries=[
+                JournalEntry(recording_file_name='c.mp3', transcription='third'),
+            ]),
+        }
+        Users._get_collection().insert_one(self.user.to_mongo())
+
+    def test_moves_days_to_day_bundle(self):
+        migrate_legacy_journal(self.user)
+
+        first_day = DayBundle.objects.get(user_id=self.user.id, date='01_JAN_2021')
+        self.assertEqual(first_day.date_int, 20210101)
+        self.assertEqual(first_day.total_seconds, 15.5)
+        self.assertEqual([entry.transcription for entry in first_day.entries], ['first', 'second'])
+
+        second_day = DayBundle.objects.get(user_id=self.user.id, date='02_JAN_2021')
+        self.assertEqual(second_day.date_int, 20210102)
+        self.assertEqual(second_day.total_seconds, 0)
+
+    def test_keeps_legacy_day_ids(self):
+        self.user.journal['01_JAN_2021'].id = '01_Jan_2021_legacy'
+        migrate_legacy_journal(self.user)
+
+        journals = JournalManager(self.user).get_all_journals()
+
+        self.assertEqual([journal["id"] for journal in journals], ['02_Jan_2021', '01_Jan_2021_legacy'])
+
+    def test_unsets_users_journal(self):
+        migrate_legacy_journal(self.user)
+
+        self.assertEqual(self.user.journal, {})
+        self.assertNotIn('journal', Users._get_collection().find_one({'_id': self.user.id}))
+
+    def test_running_twice_does_not_overwrite_day_bundles(self):
+        legacy_journal = dict(self.user.journal)
+        migrate_legacy_journal(self.user)
+        DayBundle.objects(user_id=self.user.id, date='01_JAN_2021').update_one(set__summary='written after migration')
+
+        self.user.journal = legacy_journal
+        migrate_legacy_journal(self.user)
+
+        self.assertEqual(DayBundle.objects(user_id=self.user.id).count(), 2)
+        first_day = DayBundle.objects.get(user_id=self.user.id, date='01_JAN_2021')
+        self.assertEqual(first_day.summary, 'written after migration')
+        self.assertEqual(len(first_day.entries), 2)
+
+
+@patch('app.mongo_db_logic.get_current_date', return_value='15_MAR_2021')
+class TestJournalManager(MongoTestCase):
+
+    def test_add_journal_entry(self, _mock_get_current_date):
+        journal_manager = JournalManager(self.user, date='15_MAR_2021')
+
+        journal_manager.add_journal_entry('a.mp3', 10)
+        day_bundle, journal_entry = journal_manager.add_journal_entry('b.mp3', 2.5)
+
+        self.assertEqual(day_bundle.date, '15_MAR_2021')
+        self.assertEqual(day_bundle.date_int, 20210315)
+        self.assertEqual(day_bundle.total_seconds, 12.5)
+        self.assertEqual([entry.id for entry in day_bundle.entries][-1], journal_entry.id)
+        self.assertEqual(DayBundle.objects(user_id=self.user.id).count(), 1)
+
+    def test_add_journal_entries_in_with_block(self, _mock_get_current_date):
+        with JournalManager(self.user, date='15_MAR_2021') as journal_manager:
+            day_bundle, journal_entry = journal_manager.add_journal_entry('a.mp3', 10)
+            journal_manager.add_journal_entry('b.mp3', 5)
+            journal_manager.add_entry_transcription('pending transcript', journal_entry.id)
+            self.assertIsNone(day_bundle)
+            self.assertEqual(DayBundle.objects(user_id=self.user.id).count(), 0)
+
+        day_bundle = DayBundle.objects.get(user_id=self.user.id, date='15_MAR_2021')
+        self.assertEqual(day_bundle.total_seconds, 15)
+        self.assertEqual([entry.transcription for entry in day_bundle.entries], ['pending transcript', None])
+
+    def test_add_entry_transcription(self, _mock_get_current_date):
+        # one entry per day: mongomock resolves the positional $ operator to the first entry of the array rather than
+        # the one matched by entries.id, as MongoDB does
+        journal_manager = JournalManager(self.user, date='15_MAR_2021')
+        _, journal_entry = journal_manager.add_journal_entry('a.mp3', 10)
+
+        updated_entry = journal_manager.add_entry_transcription('transcript', journal_entry.id)
+
+        self.assertEqual(updated_entry.id, journal_entry.id)
+        self.assertEqual(updated_entry.transcription, 'transcript')
+        self.assertEqual(journal_manager.get_journal_entries_for_day(), ['transcript'])
+
+    def test_add_entry_transcription_after_the_day_changed(self, mock_get_current_date):
+        _, journal_entry = JournalManager(self.user, date='15_MAR_2021').add_journal_entry('a.mp3', 10)
+        mock_get_current_date.return_value = '16_MAR_2021'
+
+        updated_entry = JournalManager(self.user).add_entry_transcription('transcript', journal_entry.id)
+
+        self.assertEqual(updated_entry.transcription, 'transcript')
+        self.assertEqual(JournalManager(self.user).get_journal_entries_for_day('15_MAR_2021'), ['transcript'])
+
+    def test_add_entry_transcription_unknown_entry(self, _mock_get_current_date):
+        journal_manager = JournalManager(self.user, date='15_MAR_2021')
+        journal_manager.add_journal_entry('a.mp3', 10)
+
+        self.assertIsNone(journal_manager.add_entry_transcription('transcript', 'UNKNOWN'))
+
+    def test_add_entry_transcription_of_another_user(self, _mock_get_current_date):
+        _, journal_entry = JournalManager(self.user, date='15_MAR_2021').add_journal_entry('a.mp3', 10)
+        other_user = Users(id=ObjectId(), email='other@example.com', first_name='Other')
+
+        self.assertIsNone(JournalManager(other_user).add_entry_transcription('transcript', journal_entry.id))
+        self.assertEqual(JournalManager(self.user).get_journal_entries_for_day(), [None])
+
+    def test_get_progress_time(self, _mock_get_current_date):
+        journal_manager = JournalManager(self.user, date='15_MAR_2021')
+        journal_manager.add_journal_entry('a.mp3', 10)
+        journal_manager.add_journal_entry('b.mp3', 20)
+
+        self.assertEqual(journal_manager.get_progress_time(), 30)
+        self.assertEqual(journal_manager.get_progress_time('14_MAR_2021'), 0)
+
+    def test_get_streaks_for_month(self, mock_get_current_date):
+        JournalManager(self.user).add_journal_entry('a.mp3', 10)
+        mock_get_current_date.return_value = '01_MAR_2021'
+        JournalManager(self.user).add_journal_entry('b.mp3', 20)
+
+        streaks = JournalManager(self.user).get_streaks_for_month(3, 2021)
+
+        self.assertEqual(len(streaks), 31)
+        self.assertEqual(streaks[0], {"date": "01_Mar_2021", "progress_time": 20})
+        self.assertEqual(streaks[14], {"date": "15_Mar_2021", "progress_time": 10})
+        self.assertEqual(sum(streak["progress_time"] for streak in streaks), 30)
+
+    def test_delete_day_bundles(self, mock_get_current_date):
+        for date in ('01_MAR_2021', '02_MAR_2021', '03_MAR_2021'):
+            mock_get_current_date.return_value = date
+            JournalManager(self.user).add_journal_entry('a.mp3', 10)
+        journal_manager = JournalManager(self.user)
+
+        journal_manager.delete_day_bundle('01_MAR_2021')
+        self.assertEqual(journal_manager.delete_day_bundles(['02_MAR_2021', '04_MAR_2021']), 1)
+
+        self.assertEqual([day_bundle.date for day_bundle in DayBundle.objects(user_id=self.user.id)], ['03_MAR_2021'])
+
+
+class TestBulkProgressForDate(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user_ids = [ObjectId(), ObjectId(), ObjectId()]
+        DayBundle(user_id=self.user_ids[0], date='15_MAR_2021', date_int=20210315, total_seconds=30).save()
+        DayBundle(user_id=self.user_ids[1], date='15_MAR_2021', date_int=20210315, total_seconds=12.5).save()
+        DayBundle(user_id=self.user_ids[1], date='14_MAR_2021', date_int=20210314, total_seconds=99).save()
+        # the third user only has a bundle for another day
+        DayBundle(user_id=self.user_ids[2], date='16_MAR_2021', date_int=20210316, total_seconds=7).save()
+
+    def test_object_ids(self):
+        progress_times = JournalManager.bulk_progress_for_date(self.user_ids, '15_MAR_2021')
+
+        self.assertEqual(progress_times, {str(self.user_ids[0]): 30, str(self.user_ids[1]): 12.5,
+                                          str(self.user_ids[2]): 0})
+
+    def test_string_ids(self):
+        user_ids = [str(user_id) for user_id in self.user_ids]
+
+        progress_times = JournalManager.bulk_progress_for_date(user_ids, '15_MAR_2021')
+
+        self.assertEqual(progress_times, {user_ids[0]: 30, user_ids[1]: 12.5, user_ids[2]: 0})
+
+    def test_mixed_ids(self):
+        user_ids = [self.user_ids[0], str(self.user_ids[1])]
+
+        progress_times = JournalManager.bulk_progress_for_date(user_ids, '15_MAR_2021')
+
+        self.assertEqual(progress_times, {str(self.user_ids[0]): 30, str(self.user_ids[1]): 12.5})
+
+    def test_no_bundles_for_the_day(self):
+        progress_times = JournalManager.bulk_progress_for_date(self.user_ids, '01_JAN_2021')
+
+        self.assertEqual(progress_times, {str(user_id): 0 for user_id in self.user_ids})
+
+
+class TestGetAllJournals(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dates = ['28_FEB_2021', '01_MAR_2021', '15_MAR_2021', '31_DEC_2020', '02_JAN_2022']
+        for date in self.dates:
+            DayBundle(user_id=self.user.id, date=date, date_int=get_date_int(date),
+                      entries=[JournalEntry(recording_file_name='a.mp3', transcription=f'transcript {date}')]).save()
+        DayBundle(user_id=ObjectId(), date='01_JAN_2023', date_int=20230101).save()
+        self.journal_manager = JournalManager(self.user)
+
+    def test_newest_first(self):
+        journals = self.journal_manager.get_all_journals()
+
+        self.assertEqual([journal["date"] for journal in journals],
+                         ['02_JAN_2022', '15_MAR_2021', '01_MAR_2021', '28_FEB_2021', '31_DEC_2020'])
+        self.assertEqual(journals[0]["transcripts"], ['transcript 02_JAN_2022'])
+        self.assertEqual(journals[0]["id"], '02_Jan_2022')
+
+    def test_limit(self):
+        journals = self.journal_manager.get_all_journals(limit=2)
+
+        self.assertEqual([journal["date"] for journal in journals], ['02_JAN_2022', '15_MAR_2021'])
+
+    def test_before(self):
+        journals = self.journal_manager.get_all_journals(before='01_MAR_2021')
+
+        self.assertEqual([journal["date"] for journal in journals], ['28_FEB_2021', '31_DEC_2020'])
+
+    def test_limit_and_before(self):
+        journals = self.journal_manager.get_all_journals(limit=1, before='15_MAR_2021')
+
+        self.assertEqual([journal["date"] for journal in journals], ['01_MAR_2021'])
+
+
+if __name__ == "__main__":
+    unittest.main()